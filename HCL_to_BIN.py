@@ -1,6 +1,8 @@
 import sys
 import os
 import time 
+import mmap
+from concurrent.futures import ProcessPoolExecutor
 
 TYPE_MAP, TYPE_SEQ, TYPE_STR, TYPE_INT, TYPE_FLOAT, TYPE_BOOL, TYPE_NULL = range(1, 8)
 
@@ -18,7 +20,12 @@ def write_string(buf, s):
     write_u32(buf, len(b))
     buf.extend(b)
 
+class RawString(bytes):
+    """Строка из входного файла в виде готовых UTF-8 байт, пишется в TLV без перекодирования"""
+
 def write_tlv(buf, obj):
+    if type(obj) is RawString:
+        buf.append(TYPE_STR); write_u32(buf, len(obj)); buf.extend(obj); return
     if obj is None:
         buf.append(TYPE_NULL); return
     if obj is True or obj is False:
@@ -95,22 +102,65 @@ class Tokenizer:
             if ch is None or ch in ' \t\n\r{}=[],"#':
                 break
             res += self.next_char()
-        
-        if res == "true": return True
-        if res == "false": return False
-        if res == "null": return None
-        
-        if res.isdigit() or (res.startswith('-') and res[1:].isdigit()):
-            return int(res)
-        try:
-            return float(res)
-        except:
-            pass
-        return res
+        return parse_word(res)
+
+def parse_word(res):
+    if res == "true": return True
+    if res == "false": return False
+    if res == "null": return None
+    
+    if res.isdigit() or (res.startswith('-') and res[1:].isdigit()):
+        return int(res)
+    try:
+        return float(res)
+    except:
+        pass
+    return res
+
+class ByteTokenizer:
+    """Токенизатор по сырым байтам (bytes или mmap); строки в кавычках отдаются как RawString"""
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.len = len(data)
+
+    def skip_whitespace(self):
+        data = self.data
+        while self.pos < self.len:
+            ch = data[self.pos]
+            if ch in b' \t\n\r':
+                self.pos += 1
+            elif ch == 0x23 or (ch == 0x2F and self.pos + 1 < self.len and data[self.pos+1] == 0x2F):
+                while self.pos < self.len and data[self.pos] not in b'\n\r':
+                    self.pos += 1
+            else:
+                break
+
+    def get_token(self):
+        self.skip_whitespace()
+        if self.pos >= self.len: return None
+        data = self.data
+        ch = data[self.pos]
+
+        if ch in b'{}=[],':
+            self.pos += 1
+            return chr(ch)
+
+        if ch == 0x22:
+            end = data.find(b'"', self.pos + 1)
+            if end == -1: raise ValueError("Unclosed string")
+            res = RawString(data[self.pos+1:end])
+            self.pos = end + 1
+            return res
+
+        start = self.pos
+        while self.pos < self.len and data[self.pos] not in b' \t\n\r{}=[],"#':
+            self.pos += 1
+        return parse_word(bytes(data[start:self.pos]).decode("utf-8"))
 
 class HCLParser:
-    def __init__(self, text):
-        self.tok = Tokenizer(text)
+    def __init__(self, text, tokenizer_cls=Tokenizer):
+        self.tok = tokenizer_cls(text)
         self.lookahead = self.tok.get_token()
 
     def consume(self):
@@ -148,35 +198,32 @@ class HCLParser:
         return obj
 
     def parse_key_value(self, current_dict):
+        path, value = self.parse_statement()
+        # Ключи словаря всегда str, байтовые метки декодируем (их мало и они короткие)
+        path = [k.decode("utf-8") if type(k) is RawString else k for k in path]
+        assign_path(current_dict, path, value)
+
+    def parse_statement(self):
+        # Возвращает путь (ключ + метки блока) и значение одного оператора
         key = self.consume()
         nxt = self.peek()
 
         if nxt == '=':
             self.consume()
-            current_dict[key] = self.parse_value()
+            value = self.parse_value()
             if self.peek() == ',': self.consume()
+            return [key], value
 
         elif nxt == '{':
-            if key not in current_dict: current_dict[key] = {}
-            val = self.parse_object()
-            current_dict[key] = val
-
-        elif isinstance(nxt, str) and nxt not in ['=', '{', '[', ']', '}']:
-            target = current_dict
-            if key not in target: target[key] = {}
-            target = target[key]
+            return [key], self.parse_object()
 
+        elif isinstance(nxt, (str, RawString)) and nxt not in ['=', '{', '[', ']', '}']:
+            path = [key]
             while self.peek() != '{' and self.peek() is not None:
-                label = self.consume()
-                if self.peek() == '{':
-                    if label not in target: target[label] = {}
-                    if not isinstance(target[label], dict): target[label] = {}
-                    block_body = self.parse_object()
-                    target[label] = block_body
-                    return
-                else:
-                    if label not in target: target[label] = {}
-                    target = target[label]
+                path.append(self.consume())
+            if self.peek() == '{':
+                return path, self.parse_object()
+            return path, {}
         else:
             raise ValueError(f"Unexpected token after key '{key}': {nxt}")
 
@@ -186,14 +233,24 @@ class HCLParser:
             self.parse_key_value(obj)
         return obj
 
+def assign_path(current_dict, path, value):
+    # Метки блока (schedule "wednesday") превращаются во вложенные словари
+    target = current_dict
+    for label in path[:-1]:
+        if label not in target: target[label] = {}
+        target = target[label]
+    target[path[-1]] = value
+
 def parse_hcl(text):
     parser = HCLParser(text)
     return parser.parse_root()
 
-def hcl_to_bin_from_file(path):
+def hcl_to_bin_from_file(path, workers=1):
 
-    with open("input.hcl", "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8") as f:
         text = f.read()
+    if workers != 1:
+        return hcl_to_bin_parallel(text, workers)
     # Парсим текст в структуру Python
     obj = parse_hcl(text)
     
@@ -201,24 +258,157 @@ def hcl_to_bin_from_file(path):
     buf = bytearray()
     write_tlv(buf, obj)
     return bytes(buf)
-def run_benchmark(input_path, iterations=100):
+
+def hcl_to_bin_from_file_mmap(path):
+    """Конвертация без декодирования файла в str: строки из кавычек идут в TLV как есть"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            obj = HCLParser(b"", ByteTokenizer).parse_root()
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                obj = HCLParser(data, ByteTokenizer).parse_root()
+
+    buf = bytearray()
+    write_tlv(buf, obj)
+    return bytes(buf)
+
+# Параллельная конвертация
+
+def _skip_space_and_comments(text, i):
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in ' \t\n\r':
+            i += 1
+        elif ch == '#' or (ch == '/' and i + 1 < n and text[i+1] == '/'):
+            while i < n and text[i] not in '\n\r':
+                i += 1
+        else:
+            break
+    return i
+
+def split_top_level_blocks(text):
+    """Делит текст на куски по концам блоков верхнего уровня (учитывая строки и комментарии)"""
+    chunks = []
+    depth = 0
+    start = 0
+    i = 0
+    n = len(text)
+    last = None          # последний значимый символ вне строк и комментариев
+    is_value = False     # текущий блок верхнего уровня - значение после '='
+    while i < n:
+        ch = text[i]
+        if ch == '"':
+            end = text.find('"', i + 1)
+            if end == -1: raise ValueError("Unclosed string")
+            i = end + 1
+            last = ch
+            continue
+        if ch == '#' or (ch == '/' and i + 1 < n and text[i+1] == '/'
+                         and (i == 0 or text[i-1] in ' \t\n\r{}=[],"')):
+            while i < n and text[i] not in '\n\r':
+                i += 1
+            continue
+        if ch in '{[':
+            if depth == 0:
+                is_value = last == '='
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0 and ch == '}':
+                i += 1
+                # После значения `key = {...}` парсер съедает запятую,
+                # поэтому она должна остаться в том же куске
+                if is_value:
+                    j = _skip_space_and_comments(text, i)
+                    if j < n and text[j] == ',':
+                        i = j + 1
+                chunks.append(text[start:i])
+                start = i
+                last = '}'
+                continue
+        if ch not in ' \t\n\r':
+            last = ch
+        i += 1
+    if text[start:].strip():
+        chunks.append(text[start:])
+    return chunks
+
+def _encode_chunk(chunk):
+    # Выполняется в дочернем процессе: парсим кусок и сразу кодируем значения
+    parser = HCLParser(chunk)
+    res = []
+    while parser.peek() is not None:
+        path, value = parser.parse_statement()
+        buf = bytearray()
+        write_tlv(buf, value)
+        res.append((path, bytes(buf)))
+    return res
+
+def write_encoded_tree(buf, node):
+    if isinstance(node, bytes):
+        buf.extend(node); return
+    buf.append(TYPE_MAP)
+    write_u32(buf, len(node))
+    for k, v in node.items():
+        buf.append(TYPE_STR)
+        write_string(buf, k)
+        write_encoded_tree(buf, v)
+
+def hcl_to_bin_parallel(text, workers=None):
+    """Парсит и кодирует блоки верхнего уровня в пуле процессов, результат совпадает с однопоточным"""
+    blocks = split_top_level_blocks(text)
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(blocks) < 2:
+        buf = bytearray()
+        write_tlv(buf, parse_hcl(text))
+        return bytes(buf)
+
+    # Склеиваем мелкие блоки, чтобы не гонять каждый через pickle отдельно
+    per_chunk = max(1, len(blocks) // (workers * 4))
+    chunks = ["".join(blocks[i:i+per_chunk]) for i in range(0, len(blocks), per_chunk)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_encode_chunk, chunks))
+
+    root = {}
+    for entries in results:
+        for path, encoded in entries:
+            target = root
+            for label in path[:-1]:
+                if label not in target: target[label] = {}
+                target = target[label]
+                if not isinstance(target, dict):
+                    # Метка вкладывается в уже закодированное значение,
+                    # такое объединение можно сделать только на целом дереве
+                    buf = bytearray()
+                    write_tlv(buf, parse_hcl(text))
+                    return bytes(buf)
+            target[path[-1]] = encoded
+
+    buf = bytearray()
+    write_encoded_tree(buf, root)
+    return bytes(buf)
+
+def run_benchmark(input_path, iterations=100, workers=1):
     if not os.path.exists(input_path):
         print(f"Ошибка: Файл {input_path} не найден для теста.")
         return
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        text = f.read()
+    # Замеряем тот же путь, которым скрипт конвертирует файл (вместе с чтением файла)
+    if workers == 1:
+        label = "mmap, байтовый токенизатор"
+        convert = lambda: hcl_to_bin_from_file_mmap(input_path)
+    else:
+        label = f"пул процессов, {workers or os.cpu_count()} шт."
+        convert = lambda: hcl_to_bin_from_file(input_path, workers)
 
-    print(f"Запуск замера времени для {iterations} итераций")
+    print(f"Запуск замера времени для {iterations} итераций ({label})")
     
     start_time = time.perf_counter()
     
     for i in range(iterations):
-    
-        obj = parse_hcl(text)
-        buf = bytearray()
-        write_tlv(buf, obj)
-        _ = bytes(buf) 
+        _ = convert()
 
     end_time = time.perf_counter()
     total_time = end_time - start_time
@@ -242,8 +432,12 @@ if __name__ == "__main__":
     try:
         print(f"Чтение {input_filename}")
         
-        # Конвертация
-        binary_data = hcl_to_bin_from_file(input_filename)
+        # Конвертация (число процессов можно передать первым аргументом)
+        workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+        if workers == 1:
+            binary_data = hcl_to_bin_from_file_mmap(input_filename)
+        else:
+            binary_data = hcl_to_bin_from_file(input_filename, workers)
         
 
         with open(output_filename, "wb") as f:
@@ -251,7 +445,7 @@ if __name__ == "__main__":
             
         print(f"Данные сохранены в {output_filename}")
         # тест на скорость 
-        run_benchmark(input_filename, 100)
+        run_benchmark(input_filename, 100, workers)
 
     except Exception as e:
         print(f"Произошла ошибка при конвертации: {e}")
\ No newline at end of file
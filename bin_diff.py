@@ -0,0 +1,257 @@
+import sys
+import hashlib
+
+from binary_to_xml import TYPE_MAP, TYPE_SEQ, TYPE_STR, TYPE_INT, TYPE_FLOAT, TYPE_BOOL, TYPE_NULL
+
+# Формат патча: PATCH_MAGIC | длина старого документа u32 | sha256 старого (32 байта)
+#              | длина нового документа u32 | sha256 нового (32 байта), затем операции
+#   op(1 байт) | число меток пути u32 | метки (u32 длина + utf-8) | [u32 длина + сырой TLV]
+# Значение есть только у OP_ADD и OP_REPLACE.
+PATCH_MAGIC = b"TLVP"
+OP_ADD, OP_REMOVE, OP_REPLACE = range(1, 4)
+DIGEST_SIZE = 32
+HEADER_SIZE = len(PATCH_MAGIC) + 2 * (4 + DIGEST_SIZE)
+
+def read_u32_at(data, pos):
+    if pos + 4 > len(data):
+        raise EOFError("Unexpected end of stream")
+    return data[pos] | (data[pos+1] << 8) | (data[pos+2] << 16) | (data[pos+3] << 24)
+
+def write_u32(buf, n):
+    for i in range(4):
+        buf.append((n >> (8*i)) & 0xFF)
+
+def write_key(buf, key):
+    b = key.encode("utf-8")
+    write_u32(buf, len(b))
+    buf.extend(b)
+
+def skip_tlv(data, pos):
+    """Возвращает позицию за концом значения, не декодируя строки"""
+    if pos >= len(data):
+        raise EOFError("Unexpected end of stream")
+    t = data[pos]
+    pos += 1
+    if t == TYPE_NULL:
+        return pos
+    if t == TYPE_BOOL:
+        return pos + 1
+    if t == TYPE_INT:
+        return pos + 8
+    if t == TYPE_FLOAT or t == TYPE_STR:
+        return pos + 4 + read_u32_at(data, pos)
+    if t == TYPE_SEQ:
+        count = read_u32_at(data, pos)
+        pos += 4
+        for _ in range(count):
+            pos = skip_tlv(data, pos)
+        return pos
+    if t == TYPE_MAP:
+        count = read_u32_at(data, pos)
+        pos += 4
+        for _ in range(count):
+            if data[pos] != TYPE_STR:
+                raise ValueError("Map key must be string")
+            pos += 5 + read_u32_at(data, pos + 1)
+            pos = skip_tlv(data, pos)
+        return pos
+    raise ValueError(f"Unknown type tag: {t}")
+
+def map_entries(data, pos):
+    """Список (ключ, начало, конец) значений словаря, который начинается в pos"""
+    count = read_u32_at(data, pos + 1)
+    pos += 5
+    entries = []
+    for _ in range(count):
+        if data[pos] != TYPE_STR:
+            raise ValueError("Map key must be string")
+        length = read_u32_at(data, pos + 1)
+        key = bytes(data[pos+5:pos+5+length]).decode("utf-8")
+        pos += 5 + length
+        end = skip_tlv(data, pos)
+        entries.append((key, pos, end))
+        pos = end
+    return entries
+
+# diff
+
+def _diff_value(old, o_start, o_end, new, n_start, n_end, path, ops):
+    if old[o_start:o_end] == new[n_start:n_end]:
+        return
+    if old[o_start] != TYPE_MAP or new[n_start] != TYPE_MAP:
+        ops.append((OP_REPLACE, path, bytes(new[n_start:n_end])))
+        return
+
+    old_entries = map_entries(old, o_start)
+    new_entries = map_entries(new, n_start)
+    new_keys = [k for k, _, _ in new_entries]
+    new_set = set(new_keys)
+    old_set = {k for k, _, _ in old_entries}
+
+    # apply_patch оставляет старый порядок ключей и дописывает новые в конец;
+    # если в новом документе порядок другой, словарь заменяется целиком
+    kept = [k for k, _, _ in old_entries if k in new_set]
+    added = [k for k in new_keys if k not in old_set]
+    if kept + added != new_keys:
+        ops.append((OP_REPLACE, path, bytes(new[n_start:n_end])))
+        return
+
+    new_by_key = {k: (s, e) for k, s, e in new_entries}
+    for key, s, e in old_entries:
+        if key not in new_set:
+            ops.append((OP_REMOVE, path + [key], None))
+        else:
+            ns, ne = new_by_key[key]
+            _diff_value(old, s, e, new, ns, ne, path + [key], ops)
+    for key in added:
+        ns, ne = new_by_key[key]
+        ops.append((OP_ADD, path + [key], bytes(new[ns:ne])))
+
+def diff_tlv(old, new):
+    """Список операций (op, путь, сырой TLV или None), превращающих old в new"""
+    ops = []
+    _diff_value(old, 0, skip_tlv(old, 0), new, 0, skip_tlv(new, 0), [], ops)
+    return ops
+
+def encode_patch(ops, old, new):
+    buf = bytearray(PATCH_MAGIC)
+    # Патч привязан к конкретному старому документу, а результат сверяется с новым
+    write_u32(buf, len(old))
+    buf.extend(hashlib.sha256(old).digest())
+    write_u32(buf, len(new))
+    buf.extend(hashlib.sha256(new).digest())
+    for op, path, value in ops:
+        buf.append(op)
+        write_u32(buf, len(path))
+        for label in path:
+            write_key(buf, label)
+        if op != OP_REMOVE:
+            write_u32(buf, len(value))
+            buf.extend(value)
+    return bytes(buf)
+
+def read_chunk_at(data, pos):
+    """Читает u32 длину и столько же байт; обрезанные данные - ошибка, а не короткий срез"""
+    length = read_u32_at(data, pos)
+    if pos + 4 + length > len(data):
+        raise EOFError("Unexpected end of stream")
+    return bytes(data[pos+4:pos+4+length]), pos + 4 + length
+
+def decode_patch(patch):
+    """Возвращает (длина базы, sha256 базы, длина результата, sha256 результата, операции)"""
+    if patch[:4] != PATCH_MAGIC:
+        raise ValueError("Not a TLV patch")
+    if len(patch) < HEADER_SIZE:
+        raise EOFError("Unexpected end of stream")
+    base_len = read_u32_at(patch, 4)
+    base_digest = bytes(patch[8:8+DIGEST_SIZE])
+    new_len = read_u32_at(patch, 8 + DIGEST_SIZE)
+    new_digest = bytes(patch[12+DIGEST_SIZE:HEADER_SIZE])
+    ops = []
+    pos = HEADER_SIZE
+    while pos < len(patch):
+        op = patch[pos]
+        if op not in (OP_ADD, OP_REMOVE, OP_REPLACE):
+            raise ValueError(f"Unknown patch op: {op}")
+        count = read_u32_at(patch, pos + 1)
+        pos += 5
+        path = []
+        for _ in range(count):
+            label, pos = read_chunk_at(patch, pos)
+            path.append(label.decode("utf-8"))
+        value = None
+        if op != OP_REMOVE:
+            value, pos = read_chunk_at(patch, pos)
+            if not value or skip_tlv(value, 0) != len(value):
+                raise ValueError("Patch value is not a single TLV")
+        ops.append((op, path, value))
+    return base_len, base_digest, new_len, new_digest, ops
+
+def make_patch(old, new):
+    return encode_patch(diff_tlv(old, new), old, new)
+
+# apply
+
+def _apply_node(buf, old, start, end, node):
+    if "op" in node:
+        if node["op"] == OP_REMOVE:
+            return
+        buf.extend(node["value"])
+        return
+    if not node["children"]:
+        buf.extend(old[start:end])
+        return
+    if old[start] != TYPE_MAP:
+        raise ValueError("Patch path goes through a non-map value")
+
+    entries = map_entries(old, start)
+    out = bytearray()
+    count = 0
+    seen = set()
+    for key, s, e in entries:
+        seen.add(key)
+        child = node["children"].get(key)
+        if child is None:
+            # Неизменённое поддерево копируется по длине, без декодирования
+            out.append(TYPE_STR)
+            write_key(out, key)
+            out.extend(old[s:e])
+            count += 1
+        elif child.get("op") != OP_REMOVE:
+            out.append(TYPE_STR)
+            write_key(out, key)
+            _apply_node(out, old, s, e, child)
+            count += 1
+    for key, child in node["children"].items():
+        if key not in seen and child.get("op") == OP_ADD:
+            out.append(TYPE_STR)
+            write_key(out, key)
+            out.extend(child["value"])
+            count += 1
+        elif key not in seen:
+            raise ValueError(f"Patch refers to missing key '{key}'")
+
+    buf.append(TYPE_MAP)
+    write_u32(buf, count)
+    buf.extend(out)
+
+def apply_patch(old, patch):
+    """Собирает новый .bin из старого и патча"""
+    base_len, base_digest, new_len, new_digest, ops = decode_patch(patch)
+    if len(old) != base_len or hashlib.sha256(old).digest() != base_digest:
+        raise ValueError("Patch was made for a different base document")
+    root = {"children": {}}
+    for op, path, value in ops:
+        node = root
+        for label in path:
+            node = node["children"].setdefault(label, {"children": {}})
+        node["op"] = op
+        node["value"] = value
+    buf = bytearray()
+    _apply_node(buf, old, 0, skip_tlv(old, 0), root)
+    # Ловит патч, обрезанный ровно по границе операции
+    if len(buf) != new_len or hashlib.sha256(buf).digest() != new_digest:
+        raise ValueError("Patched document does not match the expected result")
+    return bytes(buf)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5 or sys.argv[1] not in ("diff", "apply"):
+        print("Использование:")
+        print("  python bin_diff.py diff old.bin new.bin patch.bin")
+        print("  python bin_diff.py apply old.bin patch.bin new.bin")
+        sys.exit(1)
+
+    with open(sys.argv[2], "rb") as f:
+        first = f.read()
+    with open(sys.argv[3], "rb") as f:
+        second = f.read()
+
+    if sys.argv[1] == "diff":
+        result = make_patch(first, second)
+    else:
+        result = apply_patch(first, second)
+
+    with open(sys.argv[4], "wb") as f:
+        f.write(result)
+    print(f"Данные сохранены в {sys.argv[4]}")
@@ -0,0 +1,70 @@
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from binary_to_xml import parse_binary_data, dict_to_xml
+from binary_to_ini import dict_to_ini_section, dict_to_ini_schedule_days
+from dop3_bin_to_ini import write_pretty_ini
+
+# Приёмники: каждый получает уже декодированное дерево и путь для записи
+
+def render_xml(obj, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dict_to_xml(obj))
+
+def render_schedule_ini(obj, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dict_to_ini_schedule_days(obj))
+
+def render_section_ini(obj, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(dict_to_ini_section(obj)))
+
+def render_pretty_ini(obj, path):
+    write_pretty_ini(obj, path)
+
+SINKS = {
+    "xml": render_xml,
+    "ini": render_schedule_ini,
+    "sections": render_section_ini,
+    "pretty": render_pretty_ini,
+}
+
+DEFAULT_OUTPUTS = {
+    "xml": "output.xml",
+    "ini": "output.ini",
+    "sections": "output_sections.ini",
+    "pretty": "result.ini",
+}
+
+def run_pipeline(bin_path, outputs=None, use_processes=False, string_cache_size=4096):
+    """Читает и декодирует .bin один раз, затем параллельно пишет все выбранные форматы"""
+    outputs = outputs or DEFAULT_OUTPUTS
+    for name in outputs:
+        if name not in SINKS:
+            raise ValueError(f"Unknown sink: {name}")
+
+    with open(bin_path, "rb") as f:
+        raw_data = f.read()
+    obj = parse_binary_data(raw_data, string_cache_size)
+
+    # Потоки дешевле (дерево не копируется), процессы обходят GIL на больших файлах
+    pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_cls(max_workers=len(outputs)) as pool:
+        futures = [pool.submit(SINKS[name], obj, path) for name, path in outputs.items()]
+        for fut in futures:
+            fut.result()
+    return list(outputs.values())
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    input_file = args[0] if args else "output.bin"
+    use_processes = "--processes" in sys.argv
+
+    if not os.path.exists(input_file):
+        print(f"Ошибка: Файл '{input_file}' не найден.")
+        sys.exit(1)
+
+    for path in run_pipeline(input_file, use_processes=use_processes):
+        print(f"Данные сохранены в {path}")
@@ -4,10 +4,17 @@ import os
 TYPE_MAP, TYPE_SEQ, TYPE_STR, TYPE_INT, TYPE_FLOAT, TYPE_BOOL, TYPE_NULL = range(1, 8)
 
 class BinaryReader:
-    def __init__(self, data):
+    def __init__(self, data, string_cache_size=0):
         self.data = data
         self.pos = 0
         self.len = len(data)
+        # Кэш сырые байты -> str: повторяющиеся строки (ключи, преподаватели,
+        # аудитории) не декодируются заново и делят один объект
+        self.string_cache = {} if string_cache_size > 0 else None
+        if self.string_cache is not None and not isinstance(data, bytes):
+            # срезы bytearray/memoryview нельзя использовать как ключ словаря
+            self.data = bytes(data)
+        self.string_cache_size = string_cache_size
 
     def read_byte(self):
         if self.pos >= self.len:
@@ -39,7 +46,15 @@ class BinaryReader:
     def read_string(self):
         length = self.read_u32()
         b = self.read_bytes(length)
-        return b.decode("utf-8")
+        cache = self.string_cache
+        if cache is None:
+            return b.decode("utf-8")
+        s = cache.get(b)
+        if s is None:
+            s = b.decode("utf-8")
+            if len(cache) < self.string_cache_size:
+                cache[b] = s
+        return s
 
 # TlV парер
 
@@ -76,8 +91,8 @@ def read_tlv(reader):
     else:
         raise ValueError(f"Unknown type tag: {type_tag}")
 
-def parse_binary_data(data):
-    reader = BinaryReader(data)
+def parse_binary_data(data, string_cache_size=0):
+    reader = BinaryReader(data, string_cache_size)
     return read_tlv(reader)
 
 # xml 
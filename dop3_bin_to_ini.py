@@ -60,14 +60,15 @@ def write_pretty_ini(data, filename):
                 f.write("\n")
 
 
-try:
-    with open("output.bin", "rb") as f:
-        content = f.read()
-    
-    decoder = BinDecoder(content)
-    parsed_data = decoder.decode_next()
-    
-    write_pretty_ini(parsed_data, "result.ini")
-    print("Файл result.ini успешно создан в красивом виде!")
-except Exception as e:
-    print(f"Ошибка: {e}")
+if __name__ == "__main__":
+    try:
+        with open("output.bin", "rb") as f:
+            content = f.read()
+        
+        decoder = BinDecoder(content)
+        parsed_data = decoder.decode_next()
+        
+        write_pretty_ini(parsed_data, "result.ini")
+        print("Файл result.ini успешно создан в красивом виде!")
+    except Exception as e:
+        print(f"Ошибка: {e}")
@@ -0,0 +1,27 @@
+import pytest
+
+from HCL_to_BIN import write_tlv
+from bin_diff import make_patch, apply_patch
+
+def encode(obj):
+    buf = bytearray()
+    write_tlv(buf, obj)
+    return bytes(buf)
+
+OLD = encode({"a": "old val", "b": {"x": 1, "y": "keep"}})
+NEW = encode({"a": "new val", "b": {"x": 2, "y": "keep"}, "c": [1.5, None, True]})
+
+def test_round_trip():
+    assert apply_patch(OLD, make_patch(OLD, NEW)) == NEW
+    assert apply_patch(NEW, make_patch(NEW, OLD)) == OLD
+    assert apply_patch(OLD, make_patch(OLD, OLD)) == OLD
+
+def test_wrong_base_is_rejected():
+    with pytest.raises(ValueError):
+        apply_patch(NEW, make_patch(OLD, NEW))
+
+def test_truncated_patch_is_rejected():
+    patch = make_patch(OLD, NEW)
+    for cut in range(1, len(patch)):
+        with pytest.raises((EOFError, ValueError)):
+            apply_patch(OLD, patch[:-cut])
@@ -0,0 +1,175 @@
+from HCL_to_BIN import TYPE_MAP, TYPE_STR, TYPE_INT, TYPE_FLOAT, TYPE_BOOL, write_tlv
+from binary_to_xml import parse_binary_data
+
+# Схема описывает форму документа:
+#   {"ключ": подсхема, ...} - словарь ровно с этими ключами в этом порядке
+#   {"*": подсхема}         - словарь с любыми ключами и одинаковыми значениями
+#   str / int / float / bool - лист
+SCHEDULE_SCHEMA = {
+    "schedule": {
+        "*": {
+            "class": {
+                "*": {
+                    "subject": str,
+                    "teacher": str,
+                    "room": str,
+                    "type": str,
+                },
+            },
+        },
+    },
+}
+
+class _Mismatch(Exception):
+    """Документ не подходит под схему, нужен общий путь"""
+
+def _u32(n):
+    return n.to_bytes(4, "little")
+
+def _key_bytes(key):
+    b = key.encode("utf-8")
+    return bytes([TYPE_STR]) + _u32(len(b)) + b
+
+class _CodeGen:
+    def __init__(self):
+        self.lines = []
+        self.consts = {}
+        self.counter = 0
+
+    def new_name(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def const(self, value):
+        name = self.new_name("C")
+        self.consts[name] = value
+        return name
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+# Кодирование
+
+def _gen_encode(g, node, var, ind):
+    if node is str:
+        g.emit(ind, f"if type({var}) is not str: raise _Mismatch")
+        b = g.new_name("b")
+        g.emit(ind, f"{b} = {var}.encode('utf-8')")
+        g.emit(ind, f"buf.append({TYPE_STR}); buf += len({b}).to_bytes(4, 'little'); buf += {b}")
+    elif node is int:
+        g.emit(ind, f"if type({var}) is not int: raise _Mismatch")
+        g.emit(ind, f"buf.append({TYPE_INT}); buf += ({var} & 0xFFFFFFFFFFFFFFFF).to_bytes(8, 'little')")
+    elif node is float:
+        g.emit(ind, f"if type({var}) is not float: raise _Mismatch")
+        b = g.new_name("b")
+        g.emit(ind, f"{b} = {var}.hex().encode('utf-8')")
+        g.emit(ind, f"buf.append({TYPE_FLOAT}); buf += len({b}).to_bytes(4, 'little'); buf += {b}")
+    elif node is bool:
+        g.emit(ind, f"if type({var}) is not bool: raise _Mismatch")
+        g.emit(ind, f"buf.append({TYPE_BOOL}); buf.append(1 if {var} else 0)")
+    elif isinstance(node, dict) and list(node) == ["*"]:
+        k, v, kb = g.new_name("k"), g.new_name("v"), g.new_name("kb")
+        g.emit(ind, f"if type({var}) is not dict: raise _Mismatch")
+        g.emit(ind, f"buf.append({TYPE_MAP}); buf += len({var}).to_bytes(4, 'little')")
+        g.emit(ind, f"for {k}, {v} in {var}.items():")
+        g.emit(ind + 1, f"if type({k}) is not str: raise _Mismatch")
+        g.emit(ind + 1, f"{kb} = {k}.encode('utf-8')")
+        g.emit(ind + 1, f"buf.append({TYPE_STR}); buf += len({kb}).to_bytes(4, 'little'); buf += {kb}")
+        _gen_encode(g, node["*"], v, ind + 1)
+    elif isinstance(node, dict):
+        keys = g.const(tuple(node))
+        header = g.const(bytes([TYPE_MAP]) + _u32(len(node)))
+        g.emit(ind, f"if type({var}) is not dict or tuple({var}) != {keys}: raise _Mismatch")
+        g.emit(ind, f"buf += {header}")
+        for key, sub in node.items():
+            v = g.new_name("v")
+            g.emit(ind, f"buf += {g.const(_key_bytes(key))}")
+            g.emit(ind, f"{v} = {var}[{key!r}]")
+            _gen_encode(g, sub, v, ind)
+    else:
+        raise ValueError(f"Unsupported schema node: {node!r}")
+
+# Декодирование
+
+def _gen_read_str(g, target, ind, tag):
+    n = g.new_name("n")
+    g.emit(ind, f"if data[pos] != {tag}: raise _Mismatch")
+    g.emit(ind, f"{n} = int.from_bytes(data[pos+1:pos+5], 'little'); pos += 5")
+    g.emit(ind, f"{target} = data[pos:pos+{n}].decode('utf-8'); pos += {n}")
+
+def _gen_decode(g, node, target, ind):
+    if node is str:
+        _gen_read_str(g, target, ind, TYPE_STR)
+    elif node is int:
+        g.emit(ind, f"if data[pos] != {TYPE_INT}: raise _Mismatch")
+        g.emit(ind, f"{target} = int.from_bytes(data[pos+1:pos+9], 'little', signed=True); pos += 9")
+    elif node is float:
+        _gen_read_str(g, target, ind, TYPE_FLOAT)
+        g.emit(ind, f"{target} = float.fromhex({target})")
+    elif node is bool:
+        g.emit(ind, f"if data[pos] != {TYPE_BOOL}: raise _Mismatch")
+        g.emit(ind, f"{target} = data[pos+1] == 1; pos += 2")
+    elif isinstance(node, dict) and list(node) == ["*"]:
+        n, k, v = g.new_name("n"), g.new_name("k"), g.new_name("v")
+        g.emit(ind, f"if data[pos] != {TYPE_MAP}: raise _Mismatch")
+        g.emit(ind, f"{n} = int.from_bytes(data[pos+1:pos+5], 'little'); pos += 5")
+        g.emit(ind, f"{target} = {{}}")
+        g.emit(ind, f"for _ in range({n}):")
+        _gen_read_str(g, k, ind + 1, TYPE_STR)
+        _gen_decode(g, node["*"], v, ind + 1)
+        g.emit(ind + 1, f"{target}[{k}] = {v}")
+    elif isinstance(node, dict):
+        header = g.const(bytes([TYPE_MAP]) + _u32(len(node)))
+        g.emit(ind, f"if data[pos:pos+5] != {header}: raise _Mismatch")
+        g.emit(ind, "pos += 5")
+        fields = []
+        for key, sub in node.items():
+            kb = _key_bytes(key)
+            v = g.new_name("v")
+            g.emit(ind, f"if data[pos:pos+{len(kb)}] != {g.const(kb)}: raise _Mismatch")
+            g.emit(ind, f"pos += {len(kb)}")
+            _gen_decode(g, sub, v, ind)
+            fields.append(f"{key!r}: {v}")
+        g.emit(ind, f"{target} = {{{', '.join(fields)}}}")
+    else:
+        raise ValueError(f"Unsupported schema node: {node!r}")
+
+def _build(schema):
+    g = _CodeGen()
+    g.emit(0, "def encode(obj, buf):")
+    _gen_encode(g, schema, "obj", 1)
+    g.emit(0, "def decode(data):")
+    g.emit(1, "pos = 0")
+    _gen_decode(g, schema, "res", 1)
+    g.emit(1, "if pos > len(data): raise _Mismatch")
+    g.emit(1, "return res")
+
+    namespace = dict(g.consts, _Mismatch=_Mismatch)
+    exec("\n".join(g.lines), namespace)
+    encode_fast, decode_fast = namespace["encode"], namespace["decode"]
+
+    def encode(obj):
+        buf = bytearray()
+        try:
+            encode_fast(obj, buf)
+        except _Mismatch:
+            buf = bytearray()
+            write_tlv(buf, obj)
+        return bytes(buf)
+
+    def decode(data):
+        try:
+            return decode_fast(data)
+        except (_Mismatch, IndexError, ValueError):
+            return parse_binary_data(data)
+
+    return encode, decode
+
+_compiled = {}
+
+def compile_schema(schema):
+    """Возвращает (encode, decode), сгенерированные под схему; для чужих документов - общий путь"""
+    key = repr(schema)
+    if key not in _compiled:
+        _compiled[key] = _build(schema)
+    return _compiled[key]